@@ -25,6 +25,22 @@ SECRET_KEY = 'django-insecure-*%5xskj7q(qdx_ap58=2p5h7wh0=gr(2*byqnrdk!ttpgx+w**
 # Chave da API do Google, lida da variável de ambiente
 GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
 
+# Endereço do Ollama (pode apontar para um servidor de testes) e tempo limite
+# de cada chamada, em segundos.
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://ollama:11434')
+OLLAMA_TIMEOUT = int(os.environ.get('OLLAMA_TIMEOUT', 120))
+# Quantas chamadas simultâneas ao Ollama são permitidas neste processo.
+OLLAMA_CONCURRENCY = int(os.environ.get('OLLAMA_CONCURRENCY', 1))
+
+# Controle de admissão dos uploads (ver sentia/admission.py)
+SENTIA_MAX_INFLIGHT_ROWS = int(os.environ.get('SENTIA_MAX_INFLIGHT_ROWS', 20000))
+SENTIA_MAX_INFLIGHT_SESSIONS = int(os.environ.get('SENTIA_MAX_INFLIGHT_SESSIONS', 4))
+SENTIA_MAX_QUEUED_SESSIONS = int(os.environ.get('SENTIA_MAX_QUEUED_SESSIONS', 8))
+SENTIA_MAX_CLIENT_SESSIONS = int(os.environ.get('SENTIA_MAX_CLIENT_SESSIONS', 2))
+SENTIA_MAX_CLIENT_ROWS = int(os.environ.get('SENTIA_MAX_CLIENT_ROWS', 20000))
+SENTIA_SMALL_UPLOAD_ROWS = int(os.environ.get('SENTIA_SMALL_UPLOAD_ROWS', 200))
+SENTIA_ADMISSION_TIMEOUT = int(os.environ.get('SENTIA_ADMISSION_TIMEOUT', 60))
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
@@ -0,0 +1,208 @@
+# sentia/admission.py
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class AdmissionRejected(Exception):
+    """
+    Levantada quando um upload não pode ser admitido (cota do cliente
+    excedida, fila cheia ou tempo de espera esgotado). A view a converte
+    numa resposta HTTP com o `status` indicado: 429 quando vale tentar de
+    novo depois de `retry_after` segundos, ou 413 quando o arquivo nunca
+    caberia na cota (sem `retry_after`).
+    """
+    def __init__(self, message, retry_after=None, status=429):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+        self.status = status
+
+
+class UploadTicket:
+    """
+    Representa um upload na fila ou em processamento.
+    """
+    def __init__(self, client, rows, small, sequence):
+        self.client = client
+        self.rows = rows
+        self.small = small
+        self.sequence = sequence
+        self.last_turn = 0
+        self.queued_seconds = 0.0
+
+    def admission_key(self):
+        # Uploads pequenos antes dos grandes; dentro de cada classe, por ordem de chegada.
+        return (not self.small, self.sequence)
+
+    def turn_key(self):
+        # Round-robin: a sessão atendida há mais tempo é a próxima da sua classe.
+        return (not self.small, self.last_turn, self.sequence)
+
+
+class AdmissionController:
+    """
+    Controla quantos uploads (e quantas linhas) são processados ao mesmo tempo
+    e reparte as chamadas ao Ollama entre as sessões ativas.
+
+    - `admit()` segura o upload numa fila limitada até haver espaço sob os
+      limites globais, aplicando as cotas por cliente. Uploads pequenos
+      furam a fila e não ocupam vaga de sessão.
+    - `llm_turn()` libera no máximo `llm_concurrency` chamadas simultâneas ao
+      Ollama, alternando entre as sessões (round-robin) em vez de deixar um
+      arquivo grande monopolizar o modelo. Uploads pequenos têm prioridade.
+    """
+    def __init__(self, max_rows, max_sessions, max_queued, max_client_sessions,
+                 max_client_rows, small_upload_rows, queue_timeout, llm_concurrency):
+        self.max_rows = max_rows
+        self.max_sessions = max_sessions
+        self.max_queued = max_queued
+        self.max_client_sessions = max_client_sessions
+        self.max_client_rows = max_client_rows
+        self.small_upload_rows = small_upload_rows
+        self.queue_timeout = queue_timeout
+        self.llm_concurrency = llm_concurrency
+
+        self._condition = threading.Condition()
+        self._sequence = itertools.count(1)
+        self._turns = itertools.count(1)
+        self._queued = []
+        self._active = []
+        self._turn_waiters = []
+        self._llm_in_use = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_rows=settings.SENTIA_MAX_INFLIGHT_ROWS,
+            max_sessions=settings.SENTIA_MAX_INFLIGHT_SESSIONS,
+            max_queued=settings.SENTIA_MAX_QUEUED_SESSIONS,
+            max_client_sessions=settings.SENTIA_MAX_CLIENT_SESSIONS,
+            max_client_rows=settings.SENTIA_MAX_CLIENT_ROWS,
+            small_upload_rows=settings.SENTIA_SMALL_UPLOAD_ROWS,
+            queue_timeout=settings.SENTIA_ADMISSION_TIMEOUT,
+            llm_concurrency=settings.OLLAMA_CONCURRENCY,
+        )
+
+    def _client_usage(self, client):
+        tickets = [t for t in self._queued + self._active if t.client == client]
+        return len(tickets), sum(t.rows for t in tickets)
+
+    def _fits(self, ticket):
+        # Uploads pequenos não disputam as vagas de sessão com os grandes:
+        # só o limite de linhas vale para eles.
+        if not ticket.small and len(self._active) >= self.max_sessions:
+            return False
+        # Um arquivo maior que o limite global só entra quando estiver sozinho.
+        in_flight_rows = sum(t.rows for t in self._active)
+        return not self._active or in_flight_rows + ticket.rows <= self.max_rows
+
+    def _can_enter(self, ticket):
+        return min(self._queued, key=UploadTicket.admission_key) is ticket and self._fits(ticket)
+
+    @contextmanager
+    def admit(self, client, rows):
+        """
+        Aguarda a vez do upload e o mantém como ativo enquanto o bloco `with`
+        executa. Levanta `AdmissionRejected` se não for possível admiti-lo.
+        """
+        if rows > self.max_client_rows:
+            raise AdmissionRejected(
+                f"O arquivo tem {rows} linhas, acima do limite de {self.max_client_rows} por cliente. "
+                "Divida o arquivo em partes menores ou use a importação em lote (comando `ingest`).",
+                status=413
+            )
+
+        with self._condition:
+            client_sessions, client_rows = self._client_usage(client)
+            if client_sessions >= self.max_client_sessions:
+                raise AdmissionRejected(
+                    f"Você já tem {client_sessions} análise(s) em andamento. "
+                    "Aguarde a conclusão antes de enviar outro arquivo.",
+                    retry_after=self.queue_timeout
+                )
+            if client_rows + rows > self.max_client_rows:
+                raise AdmissionRejected(
+                    f"Sua cota de {self.max_client_rows} linhas em análise simultânea foi atingida. "
+                    "Aguarde a conclusão das análises em andamento.",
+                    retry_after=self.queue_timeout
+                )
+            if len(self._queued) >= self.max_queued:
+                raise AdmissionRejected(
+                    "O servidor está com a fila de análises cheia. Tente novamente em instantes.",
+                    retry_after=self.queue_timeout
+                )
+
+            ticket = UploadTicket(client, rows, rows <= self.small_upload_rows, next(self._sequence))
+            self._queued.append(ticket)
+            started = time.monotonic()
+            deadline = started + self.queue_timeout
+            try:
+                while not self._can_enter(ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionRejected(
+                            "O servidor está ocupado com outras análises e o tempo de espera na fila esgotou. "
+                            "Tente novamente em instantes.",
+                            retry_after=self.queue_timeout
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self._queued.remove(ticket)
+                self._condition.notify_all()
+
+            ticket.queued_seconds = time.monotonic() - started
+            self._active.append(ticket)
+
+        try:
+            yield ticket
+        finally:
+            with self._condition:
+                self._active.remove(ticket)
+                self._condition.notify_all()
+
+    @contextmanager
+    def llm_turn(self, ticket):
+        """
+        Aguarda a vez da sessão para fazer uma chamada ao Ollama.
+        """
+        with self._condition:
+            self._turn_waiters.append(ticket)
+            try:
+                while not (
+                    self._llm_in_use < self.llm_concurrency
+                    and min(self._turn_waiters, key=UploadTicket.turn_key) is ticket
+                ):
+                    self._condition.wait()
+            finally:
+                self._turn_waiters.remove(ticket)
+            self._llm_in_use += 1
+            ticket.last_turn = next(self._turns)
+            self._condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._llm_in_use -= 1
+                self._condition.notify_all()
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """
+    Retorna o controlador de admissão do processo, criado a partir das
+    configurações na primeira chamada.
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController.from_settings()
+        return _controller
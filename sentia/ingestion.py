@@ -0,0 +1,235 @@
+# sentia/ingestion.py
+
+import codecs
+import csv
+import io
+import json
+import mmap
+import os
+import re
+import time
+from datetime import datetime
+
+# Nomes aceitos para a coluna/chave com o texto do feedback.
+FEEDBACK_TEXT_COLUMNS = ['feedback_text', 'Feedback', 'texto_feedback', 'comentario']
+
+# Tokens relevantes para dividir um JSON sem decodificá-lo: strings inteiras
+# (com escapes), que são puladas, e os caracteres de estrutura.
+_JSON_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},]', re.DOTALL)
+_JSON_NON_WHITESPACE = re.compile(rb'\S')
+
+# Formatos de data aceitos, em ordem de tentativa.
+FEEDBACK_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M')
+
+
+def has_feedback_column(item):
+    """
+    Verifica se o item (linha do CSV ou objeto do JSON) possui alguma das
+    colunas aceitas para o texto do feedback.
+    """
+    return any(col in item for col in FEEDBACK_TEXT_COLUMNS)
+
+
+def _get_first(item, keys):
+    for key in keys:
+        value = item.get(key)
+        if value is not None:
+            return str(value).strip()
+    return ''
+
+
+def parse_feedback_date(value):
+    """
+    Converte a data do feedback em um objeto date, tentando cada um dos
+    formatos aceitos. Retorna None se nenhum formato for compatível.
+    """
+    if not value:
+        return None
+    for fmt in FEEDBACK_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+def normalize_feedback_item(item):
+    """
+    Normaliza um item bruto do arquivo em um dicionário com os campos do
+    modelo Feedback (exceto sessão e sentimento). Retorna None se o item não
+    tiver texto de feedback.
+    """
+    feedback_text = _get_first(item, FEEDBACK_TEXT_COLUMNS)
+    if not feedback_text:
+        return None
+
+    customer_name = _get_first(item, ('customer_name', 'Cliente'))
+    feedback_date_str = _get_first(item, ('feedback_date', 'Data'))
+    product_area = _get_first(item, ('product_area', 'Area Produto'))
+
+    return {
+        'text': feedback_text,
+        'customer_name': customer_name or None,
+        'feedback_date': parse_feedback_date(feedback_date_str),
+        'product_area': product_area or None,
+    }
+
+
+# --- Funções executadas nos processos do pool de ingestão ---
+# Elas não dependem do ORM, para que possam rodar em processos separados
+# sem precisar configurar o Django.
+
+def parse_csv_chunk(header, raw_chunk, encoding='utf-8'):
+    """
+    Decodifica, faz o parse e normaliza um bloco de linhas de um CSV.
+    Retorna a tupla (itens normalizados, linhas lidas, segundos gastos).
+    """
+    started = time.perf_counter()
+    text = raw_chunk.decode(encoding)
+    reader = csv.DictReader(io.StringIO(text), fieldnames=header)
+    normalized = []
+    rows_read = 0
+    for row in reader:
+        rows_read += 1
+        item = normalize_feedback_item(row)
+        if item:
+            normalized.append(item)
+    return normalized, rows_read, time.perf_counter() - started
+
+
+def parse_json_chunk(raw_chunk):
+    """
+    Decodifica e normaliza um bloco de um arquivo JSON gerado por
+    `iter_json_chunks` (uma lista de objetos ou um único objeto).
+    Retorna a tupla (itens normalizados, linhas lidas, segundos gastos).
+    """
+    started = time.perf_counter()
+    items = json.loads(raw_chunk.decode('utf-8'))
+    if isinstance(items, dict):
+        items = [items]
+    normalized = []
+    for item in items:
+        if isinstance(item, dict):
+            normalized_item = normalize_feedback_item(item)
+            if normalized_item:
+                normalized.append(normalized_item)
+    return normalized, len(items), time.perf_counter() - started
+
+
+def _iter_json_array_chunks(data, start, chunk_size):
+    # `start` aponta para o '[' de abertura; só as vírgulas no primeiro nível
+    # separam elementos.
+    depth = 0
+    elements = 0
+    chunk_start = start + 1
+    for match in _JSON_TOKEN.finditer(data, start):
+        char = data[match.start()]
+        if char == ord('"'):
+            continue
+        if char in b'[{':
+            depth += 1
+        elif char in b']}':
+            depth -= 1
+            if depth == 0:
+                tail = data[chunk_start:match.start()]
+                if tail.strip():
+                    yield b'[' + tail + b']'
+                if _JSON_NON_WHITESPACE.search(data, match.end()):
+                    raise ValueError("há conteúdo após o fim da lista do JSON.")
+                return
+        elif depth == 1:
+            elements += 1
+            if elements >= chunk_size:
+                yield b'[' + data[chunk_start:match.start()] + b']'
+                chunk_start = match.end()
+                elements = 0
+    raise ValueError("o JSON termina antes do fim da lista.")
+
+
+def iter_json_chunks(path, chunk_size):
+    """
+    Divide um arquivo JSON em blocos de até `chunk_size` elementos sem
+    decodificá-lo, percorrendo apenas strings e caracteres de estrutura. Cada
+    bloco é um documento JSON em bytes (uma lista); um único objeto no topo
+    vira um bloco só. A decodificação fica a cargo dos processos do pool.
+    """
+    with open(path, 'rb') as json_file:
+        if not os.fstat(json_file.fileno()).st_size:
+            raise ValueError("o arquivo JSON está vazio.")
+        with mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            bom = len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+            first = _JSON_NON_WHITESPACE.search(data, bom)
+            opener = data[first.start():first.start() + 1] if first else b''
+            if opener == b'{':
+                yield data[first.start():]
+            elif opener == b'[':
+                yield from _iter_json_array_chunks(data, first.start(), chunk_size)
+            else:
+                raise ValueError("o JSON deve conter uma lista de objetos ou um único objeto.")
+
+
+def read_csv_header(path):
+    """
+    Lê apenas o cabeçalho de um arquivo CSV.
+    """
+    with open(path, 'rb') as csv_file:
+        header_line = csv_file.readline()
+    return next(csv.reader([header_line.decode('utf-8-sig')]), [])
+
+
+def _csv_line_leaves_quote_open(line, in_quotes):
+    """
+    Percorre uma linha do CSV com as mesmas regras do módulo `csv` (dialeto
+    padrão) e diz se ela termina dentro de um campo entre aspas. Aspas só
+    abrem um campo quando são o primeiro caractere dele; dentro do campo,
+    `""` é uma aspa escapada. Aspas soltas no meio de um campo sem aspas são
+    texto comum.
+    """
+    pos = 0
+    while True:
+        if in_quotes:
+            quote = line.find(b'"', pos)
+            if quote == -1:
+                return True
+            if line[quote + 1:quote + 2] == b'"':
+                pos = quote + 2
+                continue
+            in_quotes = False
+            pos = quote + 1
+        elif line[pos:pos + 1] == b'"':
+            in_quotes = True
+            pos += 1
+            continue
+        # Fora das aspas, o que vier até o próximo delimitador é texto comum.
+        delimiter = line.find(b',', pos)
+        if delimiter == -1:
+            return False
+        pos = delimiter + 1
+
+
+def iter_csv_chunks(path, chunk_size):
+    """
+    Lê um CSV em modo binário (ignorando o cabeçalho) e o divide em blocos de
+    até `chunk_size` registros, respeitando campos entre aspas que contêm
+    quebras de linha. A decodificação fica a cargo dos processos do pool.
+    """
+    with open(path, 'rb') as csv_file:
+        csv_file.readline()
+        lines = []
+        records = 0
+        open_quotes = False
+        for line in csv_file:
+            lines.append(line)
+            # Um registro só termina quando a linha não deixa um campo entre
+            # aspas em aberto. Linhas sem aspas dispensam a varredura.
+            if open_quotes or b'"' in line:
+                open_quotes = _csv_line_leaves_quote_open(line, open_quotes)
+            if open_quotes:
+                continue
+            records += 1
+            if records >= chunk_size:
+                yield b''.join(lines)
+                lines = []
+                records = 0
+        if lines:
+            yield b''.join(lines)
@@ -0,0 +1,230 @@
+# sentia/management/commands/ingest.py
+
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from sentia.ingestion import (
+    has_feedback_column,
+    iter_csv_chunks,
+    iter_json_chunks,
+    parse_csv_chunk,
+    parse_json_chunk,
+    read_csv_header,
+)
+from sentia.models import AnalysisSession, Feedback
+from sentia.ollama_analyzer import analyze_feedback_with_ollama
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa arquivos CSV/JSON (ou diretórios com esses arquivos) em lote. "
+        "Os arquivos são divididos em blocos sem decodificar; decodificação, parse e "
+        "normalização rodam em paralelo num pool de processos; "
+        "a classificação e a gravação no banco são feitas em lotes no processo principal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="Arquivos .csv/.json ou diretórios que os contenham.")
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Número de processos para o parse (padrão: número de CPUs)."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help="Quantidade de registros enviados a cada processo por vez."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Quantidade de feedbacks gravados por bulk_create."
+        )
+        parser.add_argument(
+            '--skip-analysis', action='store_true',
+            help="Não chama o Ollama; os feedbacks são gravados como 'Desconhecido'."
+        )
+
+    def handle(self, *args, **options):
+        files = self._collect_files(options['paths'])
+        if not files:
+            raise CommandError("Nenhum arquivo .csv ou .json encontrado nos caminhos informados.")
+
+        self.workers = max(1, options['workers'])
+        self.chunk_size = max(1, options['chunk_size'])
+        self.batch_size = max(1, options['batch_size'])
+        self.skip_analysis = options['skip_analysis']
+        self.stats = {
+            'rows_read': 0, 'rows_valid': 0, 'failed_files': 0,
+            'split': 0.0, 'parse_cpu': 0.0,
+            'analysis': 0.0, 'write': 0.0,
+        }
+
+        # Mapa nome -> id das tabelas de lookup, compartilhado por todos os arquivos.
+        self.lookup_cache = {'customer': {}, 'product_area': {}, 'aspect': {}}
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Os resultados chegam na ordem de envio, então os blocos de cada
+            # arquivo ficam contíguos, enquanto o pool já processa os seguintes.
+            for path, results in groupby(self._iter_results(executor, files), key=itemgetter(0)):
+                self._ingest_file(path, (future for _, future in results))
+        self._report(time.perf_counter() - started)
+
+    def _collect_files(self, paths):
+        files = {}
+        for path in paths:
+            if os.path.isdir(path):
+                for entry in sorted(os.listdir(path)):
+                    full_path = os.path.join(path, entry)
+                    if os.path.isfile(full_path) and entry.endswith(('.csv', '.json')):
+                        files[os.path.abspath(full_path)] = None
+            elif os.path.isfile(path) and path.endswith(('.csv', '.json')):
+                files[os.path.abspath(path)] = None
+            else:
+                self.stderr.write(f"Ignorando '{path}': não é um arquivo .csv/.json nem um diretório.")
+        # Sem duplicatas, para que os blocos de cada arquivo fiquem contíguos.
+        return list(files)
+
+    def _submit_file(self, executor, path):
+        """
+        Envia ao pool os blocos de um arquivo e devolve os futures, na ordem.
+        Erros de leitura viram um future com a exceção, tratada como erro do
+        arquivo ao ser consumida.
+        """
+        submitted = 0
+        try:
+            if path.endswith('.json'):
+                for chunk in self._timed(iter_json_chunks(path, self.chunk_size)):
+                    submitted += 1
+                    yield executor.submit(parse_json_chunk, chunk)
+            else:
+                header = read_csv_header(path)
+                if not has_feedback_column(header):
+                    raise CommandError("o arquivo não possui uma coluna de feedback reconhecida.")
+                for chunk in self._timed(iter_csv_chunks(path, self.chunk_size)):
+                    submitted += 1
+                    yield executor.submit(parse_csv_chunk, header, chunk)
+        except Exception as e:
+            failed = Future()
+            failed.set_exception(e)
+            submitted += 1
+            yield failed
+
+        if not submitted:
+            # Arquivo sem registros: ainda gera a sessão (vazia), como no upload.
+            empty = Future()
+            empty.set_result(([], 0, 0.0))
+            yield empty
+
+    def _timed(self, chunks):
+        """
+        Repassa os blocos de um divisor somando em `stats['split']` o tempo
+        gasto no processo principal para lê-los e separá-los.
+        """
+        chunks = iter(chunks)
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            self.stats['split'] += time.perf_counter() - started
+            if chunk is None:
+                return
+            yield chunk
+
+    def _iter_results(self, executor, files):
+        """
+        Percorre os blocos de todos os arquivos mantendo no máximo
+        `2 * workers` tarefas no pool, e devolve pares (arquivo, future) na
+        ordem de envio. Assim o pool trabalha em vários arquivos ao mesmo tempo.
+        """
+        pending = deque()
+        for path in files:
+            for future in self._submit_file(executor, path):
+                pending.append((path, future))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+    def _ingest_file(self, path, futures):
+        """
+        Importa um arquivo numa única transação: se algum bloco falhar, o
+        arquivo inteiro (inclusive a sessão) é desfeito.
+        """
+        filename = os.path.basename(path)
+        # Nomes criados dentro de uma transação desfeita não podem ficar no mapa.
+        lookup_snapshot = {key: dict(names) for key, names in self.lookup_cache.items()}
+        file_stats = {'rows_read': 0, 'rows_valid': 0}
+        try:
+            with transaction.atomic():
+                session = AnalysisSession.objects.create_with_next_number(csv_filename=filename)
+
+                batch = []
+                for future in futures:
+                    normalized, rows_read, parse_seconds = future.result()
+                    file_stats['rows_read'] += rows_read
+                    self.stats['parse_cpu'] += parse_seconds
+                    for item in normalized:
+                        item['sentiment'], item['aspects'] = self._classify(item['text'])
+                        batch.append(item)
+                        if len(batch) >= self.batch_size:
+                            file_stats['rows_valid'] += self._write_batch(session, batch)
+                            batch = []
+                if batch:
+                    file_stats['rows_valid'] += self._write_batch(session, batch)
+        except Exception as e:
+            # Erros vindos dos processos do pool (decodificação, JSON inválido,
+            # etc.) são reportados por arquivo, sem interromper o lote.
+            self.lookup_cache = lookup_snapshot
+            self.stats['failed_files'] += 1
+            self.stderr.write(f"Erro ao importar '{filename}' (nenhuma linha foi salva): {e}")
+            return
+
+        self.stats['rows_read'] += file_stats['rows_read']
+        self.stats['rows_valid'] += file_stats['rows_valid']
+        self.stdout.write(f"'{filename}': {file_stats['rows_valid']} feedbacks salvos na sessão #{session.session_number}.")
+
+    def _classify(self, text):
+        if self.skip_analysis:
+            return Feedback.SentimentChoices.UNKNOWN, []
+        started = time.perf_counter()
+        result = analyze_feedback_with_ollama(text)
+        self.stats['analysis'] += time.perf_counter() - started
+        return result
+
+    def _write_batch(self, session, batch):
+        started = time.perf_counter()
+        Feedback.objects.bulk_create_from_items(session, batch, self.lookup_cache)
+        self.stats['write'] += time.perf_counter() - started
+        return len(batch)
+
+    def _report(self, total_seconds):
+        stats = self.stats
+
+        def rate(rows, seconds):
+            return f"{rows / seconds:,.0f} linhas/s" if seconds else "-"
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importação concluída: {stats['rows_valid']} de {stats['rows_read']} linhas "
+            f"em {total_seconds:.2f}s ({self.workers} processos)."
+        ))
+        if stats['failed_files']:
+            self.stdout.write(self.style.ERROR(
+                f"{stats['failed_files']} arquivo(s) com erro foram desfeitos; veja as mensagens acima."
+            ))
+        self.stdout.write(
+            f"  leitura/divisão:    {rate(stats['rows_read'], stats['split'])} no processo principal, "
+            f"{stats['split']:.2f}s"
+        )
+        self.stdout.write(
+            f"  parse/normalização: {rate(stats['rows_read'], stats['parse_cpu'])} por processo, "
+            f"CPU somada {stats['parse_cpu']:.2f}s"
+        )
+        if not self.skip_analysis:
+            self.stdout.write(f"  análise (Ollama):   {rate(stats['rows_valid'], stats['analysis'])}, {stats['analysis']:.2f}s")
+        self.stdout.write(f"  gravação no banco:  {rate(stats['rows_valid'], stats['write'])}, {stats['write']:.2f}s")
+        self.stdout.write(f"  total:              {rate(stats['rows_read'], total_seconds)}")
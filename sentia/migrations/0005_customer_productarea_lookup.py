@@ -0,0 +1,46 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentia', '0004_alter_feedback_feedback_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nome do Cliente')),
+            ],
+            options={
+                'verbose_name': 'Cliente',
+                'verbose_name_plural': 'Clientes',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Área do Produto')),
+            ],
+            options={
+                'verbose_name': 'Área do Produto',
+                'verbose_name_plural': 'Áreas do Produto',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feedbacks', to='sentia.customer', verbose_name='Cliente'),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='product_area_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feedbacks', to='sentia.productarea', verbose_name='Área do Produto'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def populate_lookups(apps, schema_editor):
+    """
+    Move os valores de texto livre para as tabelas de lookup: um INSERT em
+    lote por tabela e um único UPDATE correlacionado por chave estrangeira.
+    """
+    Feedback = apps.get_model('sentia', 'Feedback')
+    for model_name, text_field, fk_field in (
+        ('Customer', 'customer_name', 'customer'),
+        ('ProductArea', 'product_area', 'product_area_ref'),
+    ):
+        Lookup = apps.get_model('sentia', model_name)
+        # O order_by() vazio descarta o Meta.ordering do modelo histórico,
+        # que entraria no SELECT DISTINCT e quebraria a deduplicação.
+        names = (
+            Feedback.objects.exclude(**{f'{text_field}__isnull': True})
+            .exclude(**{text_field: ''})
+            .order_by()
+            .values_list(text_field, flat=True)
+            .distinct()
+        )
+        Lookup.objects.bulk_create(
+            [Lookup(name=name) for name in names.iterator()], batch_size=1000, ignore_conflicts=True
+        )
+        Feedback.objects.exclude(**{f'{text_field}__isnull': True}).exclude(**{text_field: ''}).update(**{
+            f'{fk_field}_id': Subquery(
+                Lookup.objects.filter(name=OuterRef(text_field)).values('id')[:1]
+            )
+        })
+
+
+def restore_text_columns(apps, schema_editor):
+    Feedback = apps.get_model('sentia', 'Feedback')
+    for model_name, text_field, fk_field in (
+        ('Customer', 'customer_name', 'customer'),
+        ('ProductArea', 'product_area', 'product_area_ref'),
+    ):
+        Lookup = apps.get_model('sentia', model_name)
+        Feedback.objects.filter(**{f'{fk_field}__isnull': False}).update(**{
+            text_field: Subquery(
+                Lookup.objects.filter(pk=OuterRef(f'{fk_field}_id')).values('name')[:1]
+            )
+        })
+
+
+class Migration(migrations.Migration):
+    # A cópia dos dados fica numa migração separada das alterações de schema:
+    # no PostgreSQL, os UPDATEs deixam eventos de FK pendentes e um ALTER TABLE
+    # na mesma transação falharia.
+
+    dependencies = [
+        ('sentia', '0005_customer_productarea_lookup'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_lookups, restore_text_columns),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentia', '0006_populate_customer_productarea'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='feedback',
+            name='customer_name',
+        ),
+        migrations.RemoveField(
+            model_name='feedback',
+            name='product_area',
+        ),
+        migrations.RenameField(
+            model_name='feedback',
+            old_name='product_area_ref',
+            new_name='product_area',
+        ),
+    ]
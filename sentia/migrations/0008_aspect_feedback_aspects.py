@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sentia', '0007_remove_feedback_text_lookups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Aspect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Aspecto')),
+            ],
+            options={
+                'verbose_name': 'Aspecto',
+                'verbose_name_plural': 'Aspectos',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='aspects',
+            field=models.ManyToManyField(blank=True, related_name='feedbacks', to='sentia.aspect', verbose_name='Aspectos'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 # Arquivo: sentia/models.py
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.db.models import Count, Q
 
@@ -45,6 +45,124 @@ class AnalysisSessionManager(models.Manager):
         
         return expected_number
 
+    def create_with_next_number(self, attempts=5, **fields):
+        """
+        Cria a sessão com o próximo número disponível. Se outra requisição
+        gravar o mesmo número ao mesmo tempo, a restrição unique acusa o
+        conflito e o número é recalculado.
+        """
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return self.create(session_number=self.get_next_session_number(), **fields)
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+
+class LookupManager(models.Manager):
+    def resolve_ids(self, names, cache=None):
+        """
+        Converte um conjunto de nomes nos ids da tabela de lookup, criando os
+        que ainda não existem. Usa um mapa em memória (`cache`) para que só os
+        nomes inéditos gerem consultas: no máximo um INSERT e um SELECT por chamada.
+        """
+        cache = {} if cache is None else cache
+        missing = {name for name in names if name and name not in cache}
+        if missing:
+            self.bulk_create([self.model(name=name) for name in missing], ignore_conflicts=True)
+            cache.update(self.filter(name__in=missing).values_list('name', 'id'))
+        return cache
+
+
+class FeedbackManager(models.Manager):
+    def bulk_create_from_items(self, session, items, lookup_cache=None):
+        """
+        Cria em lote os feedbacks a partir de itens normalizados (ver
+        `sentia.ingestion.normalize_feedback_item`) acrescidos do sentimento,
+        resolvendo cliente e área do produto nas tabelas de lookup.
+        """
+        if lookup_cache is None:
+            lookup_cache = {'customer': {}, 'product_area': {}, 'aspect': {}}
+        customer_ids = Customer.objects.resolve_ids(
+            (item['customer_name'] for item in items), lookup_cache['customer']
+        )
+        product_area_ids = ProductArea.objects.resolve_ids(
+            (item['product_area'] for item in items), lookup_cache['product_area']
+        )
+        feedbacks = self.bulk_create([
+            self.model(
+                session=session,
+                text=item['text'],
+                sentiment=item['sentiment'],
+                customer_id=customer_ids.get(item['customer_name']),
+                feedback_date=item['feedback_date'],
+                product_area_id=product_area_ids.get(item['product_area']),
+            )
+            for item in items
+        ])
+
+        # Os aspectos são gravados na tabela de ligação com um único bulk_create.
+        aspect_ids = Aspect.objects.resolve_ids(
+            (aspect for item in items for aspect in item.get('aspects', ())), lookup_cache['aspect']
+        )
+        FeedbackAspect = self.model.aspects.through
+        FeedbackAspect.objects.bulk_create([
+            FeedbackAspect(feedback_id=feedback.pk, aspect_id=aspect_ids[aspect])
+            for feedback, item in zip(feedbacks, items)
+            for aspect in item.get('aspects', ())
+        ], ignore_conflicts=True)
+        return feedbacks
+
+# --- Tabelas de Lookup ---
+class Customer(models.Model):
+    """
+    Nome de cliente armazenado uma única vez e referenciado pelos feedbacks.
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Nome do Cliente")
+
+    objects = LookupManager()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Cliente"
+        verbose_name_plural = "Clientes"
+        ordering = ['name']
+
+
+class ProductArea(models.Model):
+    """
+    Área do produto armazenada uma única vez e referenciada pelos feedbacks.
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Área do Produto")
+
+    objects = LookupManager()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Área do Produto"
+        verbose_name_plural = "Áreas do Produto"
+        ordering = ['name']
+
+class Aspect(models.Model):
+    """
+    Palavra-chave de aspecto (ex: "lento", "preço") extraída dos feedbacks.
+    """
+    name = models.CharField(max_length=50, unique=True, verbose_name="Aspecto")
+
+    objects = LookupManager()
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Aspecto"
+        verbose_name_plural = "Aspectos"
+        ordering = ['name']
+
 # --- Modelo Principal ---
 class AnalysisSession(models.Model):
     """
@@ -105,11 +223,13 @@ class Feedback(models.Model):
         verbose_name="Sentimento"
     )
     
-    customer_name = models.CharField(
-        max_length=100, 
-        blank=True, 
-        null=True, 
-        verbose_name="Nome do Cliente"
+    customer = models.ForeignKey(
+        Customer,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='feedbacks',
+        verbose_name="Cliente"
     )
     
     # --- CAMPO ALTERADO ---
@@ -120,15 +240,26 @@ class Feedback(models.Model):
         verbose_name="Data do Feedback"
     )
     
-    product_area = models.CharField(
-        max_length=100, 
-        blank=True, 
-        null=True, 
+    product_area = models.ForeignKey(
+        ProductArea,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='feedbacks',
         verbose_name="Área do Produto"
     )
 
+    aspects = models.ManyToManyField(
+        Aspect,
+        blank=True,
+        related_name='feedbacks',
+        verbose_name="Aspectos"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FeedbackManager()
+
     def __str__(self):
         display_text = self.text if len(self.text) <= 50 else self.text[:47] + '...'
         return f"'{display_text}' - {self.get_sentiment_display()} (Sessão: {self.session.id})"
@@ -1,17 +1,65 @@
 # sentia/ollama_analyzer.py
 
+import re
 import requests
 import json
+from django.conf import settings
 from .models import Feedback 
 
+# Limites para os aspectos extraídos de cada feedback.
+MAX_ASPECTS = 5
+MAX_ASPECT_LENGTH = 50
+
+SENTIMENT_TAG_RE = re.compile(r'<sentiment>(.*?)</sentiment>', re.DOTALL)
+ASPECTS_TAG_RE = re.compile(r'<aspects>(.*?)</aspects>', re.DOTALL)
+
+
+def _parse_sentiment(response_text: str):
+    # Prioriza o conteúdo da tag <sentiment>; se o modelo não a usar,
+    # procura as palavras-chave na resposta inteira.
+    match = SENTIMENT_TAG_RE.search(response_text)
+    candidate = match.group(1) if match else response_text
+
+    if 'positivo' in candidate:
+        return Feedback.SentimentChoices.POSITIVE
+    elif 'negativo' in candidate:
+        return Feedback.SentimentChoices.NEGATIVE
+    elif 'neutro' in candidate:
+        return Feedback.SentimentChoices.NEUTRAL
+    print(f"Nenhuma palavra-chave encontrada na resposta do Ollama.")
+    return Feedback.SentimentChoices.UNKNOWN
+
+
+def _parse_aspects(response_text: str):
+    match = ASPECTS_TAG_RE.search(response_text)
+    if not match:
+        return []
+
+    aspects = []
+    for raw_aspect in re.split(r'[,;\n]', match.group(1)):
+        aspect = raw_aspect.strip(' .-*"\'\t')[:MAX_ASPECT_LENGTH]
+        if aspect and aspect != 'nenhum' and aspect not in aspects:
+            aspects.append(aspect)
+    return aspects[:MAX_ASPECTS]
+
+
 def analyze_sentiment_with_ollama(text: str):
     """
     Analisa o sentimento de um texto usando a API do Ollama.
     Retorna uma das choices do modelo Feedback (POS, NEG, NEU).
     """
+    return analyze_feedback_with_ollama(text)[0]
+
+
+def analyze_feedback_with_ollama(text: str):
+    """
+    Analisa um texto usando a API do Ollama, extraindo na mesma geração o
+    sentimento e as palavras-chave dos aspectos citados.
+    Retorna a tupla (choice do modelo Feedback, lista de aspectos).
+    """
     
     prompt = f"""
-    Você é um analista de sentimentos altamente preciso. Sua tarefa é seguir um processo de três passos para classificar o feedback de um cliente.
+    Você é um analista de sentimentos altamente preciso. Sua tarefa é seguir um processo de quatro passos para classificar o feedback de um cliente.
 
     **Passo 1: Analise o Feedback**
     Leia o feedback do cliente fornecido dentro da tag `<feedback>` e identifique as emoções, opiniões e fatos principais.
@@ -25,11 +73,15 @@ def analyze_sentiment_with_ollama(text: str):
     **Passo 3: Dê a Resposta Final**
     Forneça sua classificação final dentro de uma tag `<sentiment>`, usando apenas uma das três palavras: Positivo, Negativo ou Neutro.
 
+    **Passo 4: Liste os Aspectos**
+    Liste dentro de uma tag `<aspects>` até {MAX_ASPECTS} palavras-chave curtas (uma ou duas palavras, em minúsculas, separadas por vírgula) que indiquem do que o cliente fala (ex: "lento", "confuso", "preço"). Se não houver nenhum, escreva `nenhum`.
+
     **Exemplo de Execução:**
     <feedback>A interface é um pouco confusa, mas funciona.</feedback>
     
     **Raciocínio:** O feedback aponta um problema ("confusa"), o que indica um sentimento negativo, mesmo que também mencione que funciona. A crítica tem prioridade.
     <sentiment>Negativo</sentiment>
+    <aspects>interface, confusa</aspects>
 
     ---
 
@@ -41,7 +93,7 @@ def analyze_sentiment_with_ollama(text: str):
 
     try:
         response = requests.post(
-            'http://ollama:11434/api/generate',
+            f'{settings.OLLAMA_URL}/api/generate',
             json={
                 "model": "gemma:2b",
                 "prompt": prompt,
@@ -49,7 +101,8 @@ def analyze_sentiment_with_ollama(text: str):
                 "options": {
                     "temperature": 0.2 
                 }
-            }
+            },
+            timeout=settings.OLLAMA_TIMEOUT
         )
         response.raise_for_status() 
 
@@ -57,16 +110,8 @@ def analyze_sentiment_with_ollama(text: str):
 
         print(f"Resposta bruta do Ollama: '{response_text}'")
 
-        if 'positivo' in response_text:
-            return Feedback.SentimentChoices.POSITIVE
-        elif 'negativo' in response_text:
-            return Feedback.SentimentChoices.NEGATIVE
-        elif 'neutro' in response_text:
-            return Feedback.SentimentChoices.NEUTRAL
-        else:
-            print(f"Nenhuma palavra-chave encontrada na resposta do Ollama.")
-            return Feedback.SentimentChoices.UNKNOWN
+        return _parse_sentiment(response_text), _parse_aspects(response_text)
 
     except requests.exceptions.RequestException as e:
         print(f"Ocorreu um erro ao chamar a API do Ollama: {e}")
-        return Feedback.SentimentChoices.UNKNOWN
\ No newline at end of file
+        return Feedback.SentimentChoices.UNKNOWN, []
\ No newline at end of file
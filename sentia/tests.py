@@ -1,3 +1,615 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, redirect_stdout
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from sentia.admission import AdmissionController, AdmissionRejected
+from sentia.ingestion import (
+    iter_csv_chunks,
+    iter_json_chunks,
+    normalize_feedback_item,
+    parse_csv_chunk,
+    parse_json_chunk,
+    read_csv_header,
+)
+from sentia.models import AnalysisSession, Feedback
+
+
+class CsvChunkingTests(SimpleTestCase):
+    """
+    O divisor de blocos do comando `ingest` precisa cortar o arquivo apenas
+    entre registros, mesmo com campos entre aspas que contêm quebras de linha.
+    """
+
+    def write_file(self, content):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def parse_in_chunks(self, path, chunk_size):
+        header = read_csv_header(path)
+        chunks = list(iter_csv_chunks(path, chunk_size))
+        items = []
+        for chunk in chunks:
+            normalized, _, _ = parse_csv_chunk(header, chunk)
+            items.extend(normalized)
+        return chunks, items
+
+    def parse_whole(self, content):
+        reader = csv.DictReader(io.StringIO(content.decode('utf-8-sig'), newline=''))
+        return [item for item in map(normalize_feedback_item, reader) if item]
+
+    def assert_chunking_matches_whole_file(self, content, records):
+        path = self.write_file(content)
+        expected = self.parse_whole(content)
+        self.assertEqual(len(expected), records)
+        for chunk_size in (1, 2, 3, 1000):
+            chunks, items = self.parse_in_chunks(path, chunk_size)
+            self.assertEqual(items, expected, f"chunk_size={chunk_size}")
+            self.assertEqual(len(chunks), -(-records // chunk_size))
+
+    def test_quoted_newlines(self):
+        content = (
+            'comentario,customer_name\n'
+            '"linha 1\nlinha 2",Ana\n'
+            'simples,Bia\n'
+            '"três\n\nlinhas",Caio\n'
+        ).encode()
+        self.assert_chunking_matches_whole_file(content, 3)
+        _, items = self.parse_in_chunks(self.write_file(content), 1)
+        self.assertEqual(items[0]['text'], 'linha 1\nlinha 2')
+
+    def test_escaped_quotes(self):
+        content = (
+            'comentario,customer_name\n'
+            '"ele disse ""oi""",Ana\n'
+            '"aspas ""no\nmeio"" do campo",Bia\n'
+            'sem aspas,Caio\n'
+        ).encode()
+        self.assert_chunking_matches_whole_file(content, 3)
+        _, items = self.parse_in_chunks(self.write_file(content), 1)
+        self.assertEqual(items[0]['text'], 'ele disse "oi"')
+        self.assertEqual(items[1]['text'], 'aspas "no\nmeio" do campo')
+
+    def test_stray_quote_in_unquoted_field(self):
+        # Uma aspa no meio de um campo sem aspas é texto comum para o módulo
+        # csv e não pode abrir um campo entre aspas no divisor.
+        content = (
+            'comentario,customer_name\n'
+            'tela de 5" boa,Ana\n'
+            '"linha a\nlinha b",Bia\n'
+            'ok,Caio\n'
+            'fim com aspa",Dani\n'
+            '"fecha "" e segue\n""",Edu\n'
+        ).encode()
+        self.assert_chunking_matches_whole_file(content, 5)
+        _, items = self.parse_in_chunks(self.write_file(content), 1)
+        self.assertEqual(
+            [item['text'] for item in items],
+            ['tela de 5" boa', 'linha a\nlinha b', 'ok', 'fim com aspa"', 'fecha " e segue\n"'],
+        )
+
+    def test_crlf_line_endings(self):
+        content = (
+            'comentario,customer_name\r\n'
+            '"quebra\r\ndentro",Ana\r\n'
+            'simples,Bia\r\n'
+        ).encode()
+        self.assert_chunking_matches_whole_file(content, 2)
+        _, items = self.parse_in_chunks(self.write_file(content), 1)
+        self.assertEqual(items[1], {
+            'text': 'simples', 'customer_name': 'Bia', 'feedback_date': None, 'product_area': None,
+        })
+
+    def test_bom_in_header(self):
+        content = '﻿comentario,product_area\nótimo,App\n'.encode('utf-8')
+        path = self.write_file(content)
+        self.assertEqual(read_csv_header(path), ['comentario', 'product_area'])
+        _, items = self.parse_in_chunks(path, 1)
+        self.assertEqual(items[0]['text'], 'ótimo')
+        self.assertEqual(items[0]['product_area'], 'App')
+
+
+class JsonChunkingTests(SimpleTestCase):
+    """
+    O divisor de JSON do comando `ingest` separa os elementos da lista sem
+    decodificar o arquivo; strings com vírgulas, chaves e aspas escapadas não
+    podem confundir a contagem de níveis.
+    """
+
+    def write_file(self, content):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(content.encode('utf-8'))
+        self.addCleanup(os.remove, path)
+        return path
+
+    def parse_in_chunks(self, path, chunk_size):
+        chunks = list(iter_json_chunks(path, chunk_size))
+        items = []
+        rows_read = 0
+        for chunk in chunks:
+            normalized, rows, _ = parse_json_chunk(chunk)
+            items.extend(normalized)
+            rows_read += rows
+        return chunks, items, rows_read
+
+    def test_chunking_matches_whole_file(self):
+        data = [
+            {'Feedback': 'vírgulas, [colchetes] e {chaves}', 'Cliente': 'Ana'},
+            {'Feedback': 'aspas \"escapadas\" e barra \\', 'tags': [1, {'a': [2, 3]}]},
+            {'Feedback': 'termina com barra \\', 'Data': '2024-01-31'},
+            'não é objeto',
+            {'Feedback': 'último'},
+        ]
+        path = self.write_file(json.dumps(data, indent=2, ensure_ascii=False))
+        expected = [normalize_feedback_item(item) for item in data if isinstance(item, dict)]
+        for chunk_size in (1, 2, 3, 1000):
+            chunks, items, rows_read = self.parse_in_chunks(path, chunk_size)
+            self.assertEqual(items, expected, f"chunk_size={chunk_size}")
+            self.assertEqual(rows_read, len(data))
+            self.assertEqual(len(chunks), -(-len(data) // chunk_size))
+
+    def test_single_object_with_bom(self):
+        path = self.write_file('\ufeff {"Feedback": "oi, [tudo] bem?"}\n')
+        _, items, rows_read = self.parse_in_chunks(path, 10)
+        self.assertEqual(rows_read, 1)
+        self.assertEqual(items[0]['text'], 'oi, [tudo] bem?')
+
+    def test_empty_list(self):
+        self.assertEqual(list(iter_json_chunks(self.write_file(' [ ] '), 10)), [])
+
+    def test_invalid_top_level_is_rejected(self):
+        for content in ('5', '"texto"', '', '[{"Feedback": "a"}, {"Feedback": "b"', '[{"Feedback": "a"}] x'):
+            with self.subTest(content=content), self.assertRaises(ValueError):
+                list(iter_json_chunks(self.write_file(content), 10))
+
+
+def make_controller(**overrides):
+    options = {
+        'max_rows': 1000, 'max_sessions': 4, 'max_queued': 8,
+        'max_client_sessions': 2, 'max_client_rows': 1000,
+        'small_upload_rows': 0, 'queue_timeout': 5, 'llm_concurrency': 1,
+    }
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condição não atingida a tempo.")
+        time.sleep(0.005)
+
+
+class AdmissionControllerTests(SimpleTestCase):
+
+    def start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def test_llm_turns_alternate_between_sessions(self):
+        controller = make_controller()
+        order = []
+
+        def run_session(name, ticket):
+            for _ in range(3):
+                with controller.llm_turn(ticket):
+                    order.append(name)
+
+        with ExitStack() as stack:
+            blocker = stack.enter_context(controller.admit('z', 1))
+            tickets = {name: stack.enter_context(controller.admit(name, 3)) for name in 'abc'}
+
+            # Segura o Ollama até as três sessões estarem esperando a vez.
+            with controller.llm_turn(blocker):
+                threads = [self.start_thread(run_session, name, tickets[name]) for name in 'abc']
+                wait_until(lambda: len(controller._turn_waiters) == 3)
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(''.join(order), 'abcabcabc')
+
+    def test_small_upload_gets_llm_turn_first(self):
+        controller = make_controller(small_upload_rows=5)
+        order = []
+
+        def run_once(name, ticket):
+            with controller.llm_turn(ticket):
+                order.append(name)
+
+        with ExitStack() as stack:
+            blocker = stack.enter_context(controller.admit('z', 100))
+            bulk = stack.enter_context(controller.admit('bulk', 100))
+            small = stack.enter_context(controller.admit('small', 3))
+
+            with controller.llm_turn(blocker):
+                threads = [self.start_thread(run_once, 'bulk', bulk)]
+                wait_until(lambda: len(controller._turn_waiters) == 1)
+                threads.append(self.start_thread(run_once, 'small', small))
+                wait_until(lambda: len(controller._turn_waiters) == 2)
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(order, ['small', 'bulk'])
+
+    def test_small_upload_jumps_admission_queue(self):
+        controller = make_controller(max_sessions=1, small_upload_rows=5)
+        admitted = threading.Event()
+
+        def admit_bulk():
+            with controller.admit('b', 100):
+                admitted.set()
+
+        with controller.admit('a', 100):
+            self.start_thread(admit_bulk)
+            wait_until(lambda: len(controller._queued) == 1)
+
+            # O upload pequeno entra mesmo com a vaga de sessão ocupada e
+            # com um upload grande esperando na fila.
+            with controller.admit('c', 3) as ticket:
+                self.assertTrue(ticket.small)
+                self.assertEqual(len(controller._queued), 1)
+            self.assertFalse(admitted.is_set())
+
+        self.assertTrue(admitted.wait(5))
+
+    def test_client_session_quota(self):
+        controller = make_controller(max_client_sessions=1, queue_timeout=7)
+        with controller.admit('a', 1):
+            with self.assertRaises(AdmissionRejected) as ctx:
+                with controller.admit('a', 1):
+                    pass
+            # Outro cliente continua sendo aceito.
+            with controller.admit('b', 1):
+                pass
+        self.assertEqual(ctx.exception.retry_after, 7)
+
+    def test_client_row_quota(self):
+        controller = make_controller(max_client_rows=10, queue_timeout=7)
+        with controller.admit('a', 8):
+            with self.assertRaises(AdmissionRejected) as ctx:
+                with controller.admit('a', 5):
+                    pass
+        self.assertEqual(ctx.exception.retry_after, 7)
+
+    def test_row_quota_applies_to_first_upload(self):
+        controller = make_controller(max_client_rows=10)
+        with controller.admit('a', 10):
+            pass
+        with self.assertRaises(AdmissionRejected) as ctx:
+            with controller.admit('a', 11):
+                pass
+        self.assertEqual(ctx.exception.status, 413)
+        self.assertIsNone(ctx.exception.retry_after)
+        self.assertEqual(controller._queued, [])
+
+    def test_queue_timeout(self):
+        controller = make_controller(max_sessions=1, queue_timeout=0.2)
+        with controller.admit('a', 100):
+            started = time.monotonic()
+            with self.assertRaises(AdmissionRejected) as ctx:
+                with controller.admit('b', 100):
+                    pass
+            self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(ctx.exception.retry_after, 0.2)
+        self.assertEqual(controller._queued, [])
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    response_text = '<sentiment>Negativo</sentiment>\n<aspects>lento, preço</aspects>'
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests += 1
+        self.server.prompts.append(payload['prompt'])
+        time.sleep(self.server.delay)
+        body = json.dumps({'response': self.response_text}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class UploadAdmissionViewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ollama = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+        cls.ollama.requests = 0
+        cls.ollama.prompts = []
+        cls.ollama.delay = 0
+        threading.Thread(target=cls.ollama.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ollama.shutdown()
+        cls.ollama.server_close()
+        super().tearDownClass()
+
+    def upload(self):
+        csv_file = SimpleUploadedFile('feedbacks.csv', 'comentario\nmuito lento\ncaro demais\n'.encode())
+        with redirect_stdout(io.StringIO()):
+            return self.client.post(reverse('index'), {'file': csv_file})
+
+    def test_upload_is_analyzed_through_stub_ollama(self):
+        ollama_url = f'http://127.0.0.1:{self.ollama.server_address[1]}'
+        with self.settings(OLLAMA_URL=ollama_url), mock.patch('sentia.admission._controller', None):
+            response = self.upload()
+
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(self.ollama.requests, 2)
+        feedbacks = Feedback.objects.all()
+        self.assertEqual(feedbacks.count(), 2)
+        self.assertTrue(all(f.sentiment == Feedback.SentimentChoices.NEGATIVE for f in feedbacks))
+        self.assertEqual(
+            set(feedbacks.values_list('aspects__name', flat=True)), {'lento', 'preço'}
+        )
+
+    def test_upload_over_client_quota_returns_429(self):
+        controller = make_controller(max_client_sessions=1, queue_timeout=30)
+        with controller.admit('127.0.0.1', 1), \
+                mock.patch('sentia.views.get_admission_controller', return_value=controller):
+            response = self.upload()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertFalse(AnalysisSession.objects.exists())
+
+    def test_upload_larger_than_client_quota_returns_413(self):
+        controller = make_controller(max_client_rows=1)
+        with mock.patch('sentia.views.get_admission_controller', return_value=controller):
+            response = self.upload()
+
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(response.has_header('Retry-After'))
+        self.assertFalse(AnalysisSession.objects.exists())
+
+
+class ConcurrentUploadTests(TransactionTestCase):
+    """
+    Uploads simultâneos de ponta a ponta, com o Ollama simulado: as chamadas
+    ao modelo se alternam entre as sessões e as cotas viram 429/413.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ollama = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+        cls.ollama.requests = 0
+        cls.ollama.prompts = []
+        cls.ollama.delay = 0.1
+        threading.Thread(target=cls.ollama.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ollama.shutdown()
+        cls.ollama.server_close()
+        super().tearDownClass()
+
+    def upload(self, client_ip, label, rows):
+        lines = ''.join(f'feedback {label}{i}\n' for i in range(rows))
+        csv_file = SimpleUploadedFile(f'{label}.csv', f'comentario\n{lines}'.encode())
+        try:
+            with redirect_stdout(io.StringIO()):
+                return Client().post(reverse('index'), {'file': csv_file}, REMOTE_ADDR=client_ip)
+        finally:
+            connections.close_all()
+
+    def upload_in_thread(self, results, client_ip, label, rows):
+        def run():
+            results[label] = self.upload(client_ip, label, rows)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_concurrent_uploads(self):
+        controller = make_controller(
+            max_sessions=2, max_queued=1, max_client_sessions=1, max_client_rows=10, queue_timeout=0.3,
+        )
+        ollama_url = f'http://127.0.0.1:{self.ollama.server_address[1]}'
+        results = {}
+        with self.settings(OLLAMA_URL=ollama_url), \
+                mock.patch('sentia.views.get_admission_controller', return_value=controller):
+            # B só começa depois da primeira chamada de A, para que as sessões
+            # não sejam gravadas ao mesmo tempo (o SQLite em memória dos testes
+            # recusa escritas concorrentes em vez de esperar).
+            threads = [self.upload_in_thread(results, '10.0.0.1', 'A', 4)]
+            wait_until(lambda: self.ollama.prompts)
+            threads.append(self.upload_in_thread(results, '10.0.0.2', 'B', 4))
+            wait_until(lambda: len(controller._active) == 2)
+
+            # Mesmo cliente com uma análise em andamento: cota de sessões.
+            results['C'] = self.upload('10.0.0.1', 'C', 1)
+            # Sem vaga de sessão: espera na fila até o tempo limite.
+            results['D'] = self.upload('10.0.0.3', 'D', 2)
+            # Nunca caberia na cota de linhas do cliente.
+            results['E'] = self.upload('10.0.0.4', 'E', 11)
+
+            for thread in threads:
+                thread.join(10)
+
+        self.assertEqual({label: r.status_code for label, r in results.items()},
+                         {'A': 302, 'B': 302, 'C': 429, 'D': 429, 'E': 413})
+        self.assertEqual(results['D']['Retry-After'], '0.3')
+
+        order = [re.search(r'feedback ([A-Z])\d', prompt).group(1) for prompt in self.ollama.prompts]
+        self.assertEqual(sorted(order), list('AAAABBBB'))
+        # Round-robin: nenhuma sessão faz duas chamadas seguidas.
+        self.assertTrue(all(a != b for a, b in zip(order, order[1:])), order)
+
+        sessions = AnalysisSession.objects.all()
+        self.assertEqual(sorted(s.csv_filename for s in sessions), ['A.csv', 'B.csv'])
+        self.assertEqual(sorted(s.session_number for s in sessions), [1, 2])
+        self.assertEqual(Feedback.objects.count(), 8)
+
+
+def feedback_item(text, sentiment, feedback_date=None, product_area=None, aspects=()):
+    return {
+        'text': text, 'customer_name': None, 'feedback_date': feedback_date,
+        'product_area': product_area, 'sentiment': sentiment, 'aspects': list(aspects),
+    }
+
+
+POSITIVE = Feedback.SentimentChoices.POSITIVE
+NEGATIVE = Feedback.SentimentChoices.NEGATIVE
+NEUTRAL = Feedback.SentimentChoices.NEUTRAL
+
+
+class SentimentTrendsViewTests(TestCase):
+
+    def create_feedbacks(self, *items, session_number=1):
+        session = AnalysisSession.objects.create(session_number=session_number)
+        Feedback.objects.bulk_create_from_items(session, list(items))
+        return session
+
+    def get_trends(self, **params):
+        return self.client.get(reverse('sentiment_trends'), params)
+
+    def test_month_zero_fill_across_year_boundary(self):
+        self.create_feedbacks(
+            feedback_item('a', POSITIVE, date(2023, 11, 15)),
+            feedback_item('b', NEGATIVE, date(2024, 2, 3)),
+            feedback_item('c', NEUTRAL, date(2024, 2, 20)),
+            feedback_item('sem data', POSITIVE),
+        )
+        response = self.get_trends(granularity='month')
+
+        self.assertEqual(response.status_code, 200)
+        buckets = response.json()['buckets']
+        self.assertEqual(
+            [(b['period'], b['total']) for b in buckets],
+            [('2023-11-01', 1), ('2023-12-01', 0), ('2024-01-01', 0), ('2024-02-01', 2)],
+        )
+        self.assertEqual(buckets[0]['positive'], 1)
+        self.assertEqual((buckets[3]['negative'], buckets[3]['neutral'], buckets[3]['unknown']), (1, 1, 0))
+
+    def test_week_and_day_zero_fill(self):
+        self.create_feedbacks(
+            feedback_item('a', POSITIVE, date(2024, 12, 30)),
+            feedback_item('b', POSITIVE, date(2025, 1, 8)),
+        )
+        weeks = self.get_trends(granularity='week').json()['buckets']
+        self.assertEqual([(b['period'], b['total']) for b in weeks], [('2024-12-30', 1), ('2025-01-06', 1)])
+
+        days = self.get_trends(granularity='day').json()['buckets']
+        self.assertEqual(len(days), 10)
+        self.assertEqual(days[0]['period'], '2024-12-30')
+        self.assertEqual(days[2], {
+            'period': '2025-01-01', 'total': 0, 'positive': 0, 'negative': 0, 'neutral': 0, 'unknown': 0,
+        })
+        self.assertEqual(days[-1]['period'], '2025-01-08')
+
+    def test_split_by_returns_only_periods_with_data(self):
+        self.create_feedbacks(
+            feedback_item('a', POSITIVE, date(2024, 1, 10), 'App'),
+            feedback_item('b', NEGATIVE, date(2024, 3, 10), 'Site'),
+            feedback_item('c', NEGATIVE, date(2024, 3, 12), 'Site'),
+        )
+        response = self.get_trends(granularity='month', split_by='product_area')
+
+        self.assertEqual(response.json()['split_by'], 'product_area')
+        self.assertEqual(
+            [(b['period'], b['group'], b['total']) for b in response.json()['buckets']],
+            [('2024-01-01', 'App', 1), ('2024-03-01', 'Site', 2)],
+        )
+
+    def test_session_filter(self):
+        self.create_feedbacks(feedback_item('a', POSITIVE, date(2024, 1, 10)))
+        other = self.create_feedbacks(
+            feedback_item('b', NEGATIVE, date(2024, 1, 11)), session_number=2,
+        )
+        buckets = self.get_trends(granularity='month', session=other.pk).json()['buckets']
+        self.assertEqual([(b['total'], b['negative']) for b in buckets], [(1, 1)])
+
+    def test_too_many_periods(self):
+        self.create_feedbacks(
+            feedback_item('a', POSITIVE, date(2024, 1, 1)),
+            feedback_item('b', POSITIVE, date(2024, 1, 4)),
+        )
+        with mock.patch('sentia.views.TREND_MAX_PERIODS', 3):
+            self.assertEqual(self.get_trends(granularity='day').status_code, 400)
+            self.assertEqual(self.get_trends(granularity='week').status_code, 200)
+
+    def test_invalid_parameters(self):
+        for params in ({'granularity': 'year'}, {'split_by': 'customer'}, {'session': 'abc'}):
+            with self.subTest(params=params):
+                response = self.get_trends(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+class TopAspectsViewTests(TestCase):
+
+    def setUp(self):
+        self.session = AnalysisSession.objects.create(session_number=1)
+        Feedback.objects.bulk_create_from_items(self.session, [
+            feedback_item('a', NEGATIVE, product_area='App', aspects=['preço', 'lento']),
+            feedback_item('b', NEGATIVE, product_area='App', aspects=['preço', 'app']),
+            feedback_item('c', NEGATIVE, product_area='Site', aspects=['preço', 'lento', 'app']),
+            feedback_item('d', NEGATIVE, product_area='Site', aspects=['suporte']),
+            feedback_item('e', POSITIVE, product_area='Site', aspects=['rápido']),
+        ])
+
+    def get_aspects(self, **params):
+        return self.client.get(reverse('top_aspects'), params)
+
+    def groups(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {
+            group['group']: [(a['aspect'], a['count']) for a in group['aspects']]
+            for group in response.json()['groups']
+        }
+
+    def test_limit_cuts_each_group_with_ties_by_name(self):
+        groups = self.groups(self.get_aspects(group_by='sentiment', limit=2))
+        # 'app' e 'lento' empatam com 2 menções; o desempate é pelo nome.
+        self.assertEqual(groups, {NEGATIVE: [('preço', 3), ('app', 2)], POSITIVE: [('rápido', 1)]})
+
+    def test_group_by_product_area(self):
+        response = self.get_aspects(group_by='product_area')
+        self.assertEqual(response.json()['group_by'], 'product_area')
+        self.assertEqual(self.groups(response), {
+            'App': [('preço', 2), ('app', 1), ('lento', 1)],
+            'Site': [('app', 1), ('lento', 1), ('preço', 1), ('rápido', 1), ('suporte', 1)],
+        })
+
+    def test_dashboard_filters_apply(self):
+        groups = self.groups(self.get_aspects(sentiment=POSITIVE, session=self.session.pk))
+        self.assertEqual(groups, {POSITIVE: [('rápido', 1)]})
+
+    def test_limit_is_capped(self):
+        with mock.patch('sentia.views.TOP_ASPECTS_MAX', 1):
+            groups = self.groups(self.get_aspects(limit=10))
+        self.assertEqual(groups[NEGATIVE], [('preço', 3)])
+
+    def test_invalid_parameters(self):
+        for params in ({'limit': 0}, {'limit': -1}, {'limit': 'x'}, {'group_by': 'customer'}, {'session': 'abc'}):
+            with self.subTest(params=params):
+                response = self.get_aspects(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
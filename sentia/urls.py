@@ -7,4 +7,6 @@ urlpatterns = [
     path('delete_session/<int:session_id>/', views.delete_session_view, name='delete_session'),
     path('export/csv/', views.export_filtered_data_view, name='export_filtered_data_csv'),
     path('export/json/', views.export_filtered_data_json_view, name='export_filtered_data_json'),
+    path('api/trends/', views.sentiment_trends_view, name='sentiment_trends'),
+    path('api/aspects/', views.top_aspects_view, name='top_aspects'),
 ]
\ No newline at end of file
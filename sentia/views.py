@@ -3,12 +3,88 @@
 import csv
 import io
 import json
-from datetime import datetime
+from datetime import timedelta
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse # Adicionar JsonResponse
-from .models import AnalysisSession, Feedback
-from .ollama_analyzer import analyze_sentiment_with_ollama
+from django.db.models import Count, Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber, TruncDay, TruncWeek, TruncMonth
+from .models import AnalysisSession, Feedback, ProductArea
+from .admission import AdmissionRejected, get_admission_controller
+from .ingestion import FEEDBACK_TEXT_COLUMNS, has_feedback_column, normalize_feedback_item
+from .ollama_analyzer import analyze_feedback_with_ollama
+
+# Granularidades aceitas pelo endpoint de tendências e a função de truncamento
+# usada para agrupar as datas no banco.
+TREND_GRANULARITIES = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+# Máximo de períodos preenchidos com zeros numa série de tendência.
+TREND_MAX_PERIODS = 1000
+
+# Quantidade padrão e máxima de aspectos retornados por grupo.
+TOP_ASPECTS_DEFAULT = 10
+TOP_ASPECTS_MAX = 50
+
+# Dimensões opcionais para quebrar as séries de tendência.
+TREND_SPLITS = {
+    'product_area': 'product_area__name',
+    'session': 'session__session_number',
+}
+
+
+def _next_period(period, granularity):
+    """
+    Retorna o início do período seguinte, para a granularidade informada.
+    """
+    if granularity == 'day':
+        return period + timedelta(days=1)
+    if granularity == 'week':
+        return period + timedelta(weeks=1)
+    if period.month == 12:
+        return period.replace(year=period.year + 1, month=1)
+    return period.replace(month=period.month + 1)
+
+
+def _count_periods(first_period, last_period, granularity):
+    """
+    Retorna quantos períodos existem entre dois inícios de período, inclusive.
+    """
+    if granularity == 'day':
+        return (last_period - first_period).days + 1
+    if granularity == 'week':
+        return (last_period - first_period).days // 7 + 1
+    return (last_period.year - first_period.year) * 12 + last_period.month - first_period.month + 1
+
+
+def _filter_feedbacks(feedbacks_query, params):
+    """
+    Aplica os filtros do dashboard (sessão, sentimento e área do produto)
+    a um QuerySet de Feedback. Levanta ValueError se a sessão não for um
+    número inteiro.
+    """
+    selected_session_id = params.get('session')
+    selected_sentiment = params.get('sentiment')
+    selected_product_area = params.get('product_area')
+
+    if selected_session_id:
+        try:
+            selected_session_id = int(selected_session_id)
+        except ValueError:
+            raise ValueError("O parâmetro 'session' deve ser um número inteiro.")
+        feedbacks_query = feedbacks_query.filter(session__id=selected_session_id)
+    if selected_sentiment:
+        feedbacks_query = feedbacks_query.filter(sentiment=selected_sentiment)
+    if selected_product_area:
+        # O icontains roda só sobre a tabela de áreas (pequena); o filtro nos
+        # feedbacks é feito pela chave estrangeira.
+        feedbacks_query = feedbacks_query.filter(
+            product_area__in=ProductArea.objects.filter(name__icontains=selected_product_area)
+        )
+    return feedbacks_query
 
 def index_view(request):
     if request.method == 'POST':
@@ -57,73 +133,47 @@ def index_view(request):
                 })
             
             first_item = feedbacks_data[0]
-            required_cols_options = ['feedback_text', 'Feedback', 'texto_feedback', 'comentario']
-            if not any(col in first_item for col in required_cols_options):
+            if not has_feedback_column(first_item):
                 error_msg = (
                     f"O arquivo {('CSV' if is_csv else 'JSON')} precisa ter uma chave/coluna para o feedback. "
-                    f"Nenhuma das esperadas foi encontrada: {', '.join(required_cols_options)}."
+                    f"Nenhuma das esperadas foi encontrada: {', '.join(FEEDBACK_TEXT_COLUMNS)}."
                 )
                 return render(request, 'sentia/pages/index.html', {'error_message': error_msg})
 
-            next_number = AnalysisSession.objects.get_next_session_number()
-            new_session = AnalysisSession.objects.create(
-                csv_filename=uploaded_file.name,
-                session_number=next_number
-            )
-
-            feedbacks_to_create = []
-
-            for item in feedbacks_data:
-                feedback_text = item.get('feedback_text', item.get('Feedback', '')).strip()
-                if not feedback_text:
-                    continue
-
-                customer_name = item.get('customer_name', item.get('Cliente', '')).strip()
-                feedback_date_str = item.get('feedback_date', item.get('Data', '')).strip()
-                product_area = item.get('product_area', item.get('Area Produto', '')).strip()
-
-                parsed_date = None
-                if feedback_date_str:
-                    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M'):
-                        try:
-                            parsed_date = datetime.strptime(feedback_date_str, fmt).date()
-                            break
-                        except ValueError:
-                            pass
-
-                sentiment_result = analyze_sentiment_with_ollama(feedback_text)
-                feedbacks_to_create.append(
-                    Feedback(
-                        session=new_session,
-                        text=feedback_text,
-                        sentiment=sentiment_result,
-                        customer_name=customer_name if customer_name else None,
-                        feedback_date=parsed_date,
-                        product_area=product_area if product_area else None
-                    )
-                )
+            normalized_items = [item for item in map(normalize_feedback_item, feedbacks_data) if item]
 
-            if feedbacks_to_create:
-                Feedback.objects.bulk_create(feedbacks_to_create)
-
-            messages.success(request, f"Arquivo '{uploaded_file.name}' analisado com sucesso e salvo na sessão #{new_session.session_number}.")
+            # --- Controle de admissão ---
+            # Limita os uploads simultâneos e reparte as chamadas ao Ollama
+            # entre as sessões, priorizando os arquivos pequenos.
+            controller = get_admission_controller()
+            try:
+                with controller.admit(request.META.get('REMOTE_ADDR'), len(normalized_items)) as ticket:
+                    new_session = AnalysisSession.objects.create_with_next_number(csv_filename=uploaded_file.name)
+
+                    for normalized_item in normalized_items:
+                        with controller.llm_turn(ticket):
+                            normalized_item['sentiment'], normalized_item['aspects'] = analyze_feedback_with_ollama(normalized_item['text'])
+
+                    if normalized_items:
+                        Feedback.objects.bulk_create_from_items(new_session, normalized_items)
+            except AdmissionRejected as e:
+                response = render(request, 'sentia/pages/index.html', {'error_message': e.message}, status=e.status)
+                if e.retry_after is not None:
+                    response['Retry-After'] = str(e.retry_after)
+                return response
+
+            queued_message = f" (aguardou {ticket.queued_seconds:.0f}s na fila)" if ticket.queued_seconds >= 1 else ""
+            messages.success(request, f"Arquivo '{uploaded_file.name}' analisado com sucesso e salvo na sessão #{new_session.session_number}{queued_message}.")
             return redirect('dashboard')
 
     return render(request, 'sentia/pages/index.html')
 
 
 def dashboard_view(request):
-    all_feedbacks = Feedback.objects.all()
     selected_session_id = request.GET.get('session')
     selected_sentiment = request.GET.get('sentiment')
     selected_product_area = request.GET.get('product_area')
-
-    if selected_session_id:
-        all_feedbacks = all_feedbacks.filter(session__id=selected_session_id)
-    if selected_sentiment:
-        all_feedbacks = all_feedbacks.filter(sentiment=selected_sentiment)
-    if selected_product_area:
-        all_feedbacks = all_feedbacks.filter(product_area__icontains=selected_product_area)
+    all_feedbacks = _filter_feedbacks(Feedback.objects.select_related('session', 'customer', 'product_area'), request.GET)
 
     total_feedbacks = all_feedbacks.count()
     positive_count = all_feedbacks.filter(sentiment=Feedback.SentimentChoices.POSITIVE).count()
@@ -141,7 +191,11 @@ def dashboard_view(request):
     }
 
     all_sessions = AnalysisSession.objects.with_feedback_counts().order_by('-created_at')
-    all_product_areas = Feedback.objects.filter(product_area__isnull=False).values_list('product_area', flat=True).distinct()
+    # Só as áreas que ainda têm feedback (as linhas de lookup não são apagadas
+    # junto com as sessões).
+    all_product_areas = ProductArea.objects.filter(
+        Exists(Feedback.objects.filter(product_area=OuterRef('pk')))
+    ).values_list('name', flat=True)
 
     context = {
         'stats': stats,
@@ -172,18 +226,9 @@ def export_filtered_data_view(request):
     """
     Exporta os feedbacks filtrados para um arquivo CSV.
     """
-    feedbacks_query = Feedback.objects.select_related('session').all()
-    
-    selected_session_id = request.GET.get('session')
-    selected_sentiment = request.GET.get('sentiment')
-    selected_product_area = request.GET.get('product_area')
-
-    if selected_session_id:
-        feedbacks_query = feedbacks_query.filter(session__id=selected_session_id)
-    if selected_sentiment:
-        feedbacks_query = feedbacks_query.filter(sentiment=selected_sentiment)
-    if selected_product_area:
-        feedbacks_query = feedbacks_query.filter(product_area__icontains=selected_product_area)
+    feedbacks_query = _filter_feedbacks(
+        Feedback.objects.select_related('session', 'customer', 'product_area'), request.GET
+    )
 
     response = HttpResponse(content_type='text/csv; charset=utf-8')
     response['Content-Disposition'] = 'attachment; filename="feedbacks_export.csv"'
@@ -200,9 +245,9 @@ def export_filtered_data_view(request):
             feedback.id,
             feedback.text,
             feedback.get_sentiment_display(),
-            feedback.customer_name or 'N/A',
+            feedback.customer.name if feedback.customer else 'N/A',
             feedback.feedback_date.strftime('%d/%m/%Y') if feedback.feedback_date else 'N/A',
-            feedback.product_area or 'N/A',
+            feedback.product_area.name if feedback.product_area else 'N/A',
             f"Sessão #{feedback.session.session_number}",
             feedback.created_at.strftime('%d/%m/%Y %H:%M')
         ])
@@ -213,27 +258,158 @@ def export_filtered_data_json_view(request):
     """
     Exporta os feedbacks filtrados para um arquivo JSON.
     """
-    feedbacks_query = Feedback.objects.select_related('session').all()
-    
-    selected_session_id = request.GET.get('session')
-    selected_sentiment = request.GET.get('sentiment')
-    selected_product_area = request.GET.get('product_area')
-
-    if selected_session_id:
-        feedbacks_query = feedbacks_query.filter(session__id=selected_session_id)
-    if selected_sentiment:
-        feedbacks_query = feedbacks_query.filter(sentiment=selected_sentiment)
-    if selected_product_area:
-        feedbacks_query = feedbacks_query.filter(product_area__icontains=selected_product_area)
+    feedbacks_query = _filter_feedbacks(Feedback.objects.all(), request.GET)
 
     # Converte o queryset em uma lista de dicionários
+    # Os nomes vêm das tabelas de lookup, mas as chaves do JSON são mantidas.
     data_to_export = list(feedbacks_query.values(
-        'id', 'text', 'sentiment', 'customer_name', 
-        'feedback_date', 'product_area', 'session__session_number', 'created_at'
+        'id', 'text', 'sentiment', 'customer__name',
+        'feedback_date', 'product_area__name', 'session__session_number', 'created_at'
     ))
+    for row in data_to_export:
+        row['customer_name'] = row.pop('customer__name')
+        row['product_area'] = row.pop('product_area__name')
 
     # Prepara a resposta JSON
     response = JsonResponse(data_to_export, safe=False, json_dumps_params={'ensure_ascii': False, 'indent': 2})
     response['Content-Disposition'] = 'attachment; filename="feedbacks_export.json"'
     
-    return response
\ No newline at end of file
+    return response
+
+
+def sentiment_trends_view(request):
+    """
+    Retorna a contagem de sentimentos agrupada por período (dia, semana ou mês),
+    opcionalmente quebrada por área do produto ou sessão.
+
+    A agregação é feita inteiramente no banco (GROUP BY sobre a data truncada),
+    então o tamanho da resposta cresce com o número de períodos, e não de feedbacks.
+    Sem quebra, os períodos vazios voltam zerados (até `TREND_MAX_PERIODS`);
+    com quebra, só voltam os pares período/grupo que têm feedbacks.
+    """
+    granularity = request.GET.get('granularity', 'day')
+    split_by = request.GET.get('split_by') or None
+
+    if granularity not in TREND_GRANULARITIES:
+        return JsonResponse(
+            {'error': f"Granularidade inválida. Use uma de: {', '.join(TREND_GRANULARITIES)}."},
+            status=400
+        )
+    if split_by and split_by not in TREND_SPLITS:
+        return JsonResponse(
+            {'error': f"Quebra inválida. Use uma de: {', '.join(TREND_SPLITS)}."},
+            status=400
+        )
+
+    try:
+        feedbacks_query = _filter_feedbacks(Feedback.objects.all(), request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    feedbacks_query = feedbacks_query.filter(feedback_date__isnull=False)
+
+    group_fields = ['period']
+    if split_by:
+        group_fields.append(TREND_SPLITS[split_by])
+
+    rows = (
+        feedbacks_query
+        .annotate(period=TREND_GRANULARITIES[granularity]('feedback_date'))
+        .values(*group_fields)
+        .annotate(
+            total=Count('id'),
+            positive=Count('id', filter=Q(sentiment=Feedback.SentimentChoices.POSITIVE)),
+            negative=Count('id', filter=Q(sentiment=Feedback.SentimentChoices.NEGATIVE)),
+            neutral=Count('id', filter=Q(sentiment=Feedback.SentimentChoices.NEUTRAL)),
+            unknown=Count('id', filter=Q(sentiment=Feedback.SentimentChoices.UNKNOWN)),
+        )
+        .order_by(*group_fields)
+    )
+
+    count_keys = ('total', 'positive', 'negative', 'neutral', 'unknown')
+
+    if split_by:
+        # Zerar cada grupo em cada período multiplicaria a resposta pelo
+        # número de grupos; as séries quebradas voltam só com dados reais.
+        buckets = [
+            {'period': row['period'].isoformat(), 'group': row[TREND_SPLITS[split_by]],
+             **{key: row[key] for key in count_keys}}
+            for row in rows
+        ]
+    else:
+        counts = {row['period']: {key: row[key] for key in count_keys} for row in rows}
+
+        # Períodos sem feedback entre o primeiro e o último voltam zerados, para
+        # que o gráfico não junte pontos que não são vizinhos no tempo.
+        buckets = []
+        if counts:
+            period, last_period = min(counts), max(counts)
+            total_periods = _count_periods(period, last_period, granularity)
+            if total_periods > TREND_MAX_PERIODS:
+                return JsonResponse(
+                    {'error': (
+                        f"O intervalo dos dados tem {total_periods} períodos com a granularidade '{granularity}' "
+                        f"(máximo: {TREND_MAX_PERIODS}). Use uma granularidade maior ou aplique filtros."
+                    )},
+                    status=400
+                )
+            empty = dict.fromkeys(count_keys, 0)
+            while period <= last_period:
+                buckets.append({'period': period.isoformat(), **counts.get(period, empty)})
+                period = _next_period(period, granularity)
+
+    return JsonResponse({
+        'granularity': granularity,
+        'split_by': split_by,
+        'buckets': buckets,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def top_aspects_view(request):
+    """
+    Retorna os aspectos mais citados, agrupados por sentimento ou por área do
+    produto. A contagem é feita no banco (GROUP BY sobre a tabela de ligação
+    feedback-aspecto), respeitando os mesmos filtros do dashboard.
+    """
+    group_by = request.GET.get('group_by', 'sentiment')
+    if group_by not in ('sentiment', 'product_area'):
+        return JsonResponse(
+            {'error': "Agrupamento inválido. Use uma de: sentiment, product_area."},
+            status=400
+        )
+    try:
+        limit = min(int(request.GET.get('limit', TOP_ASPECTS_DEFAULT)), TOP_ASPECTS_MAX)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return JsonResponse({'error': "O parâmetro 'limit' deve ser um número inteiro maior que zero."}, status=400)
+
+    group_field = 'feedback__sentiment' if group_by == 'sentiment' else 'feedback__product_area__name'
+    try:
+        feedbacks_query = _filter_feedbacks(Feedback.objects.all(), request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    # O ranking por grupo também é feito no banco (ROW_NUMBER), então só
+    # voltam `limit` linhas por grupo, independentemente de quantos aspectos existam.
+    rows = (
+        Feedback.aspects.through.objects
+        .filter(feedback__in=feedbacks_query)
+        .values(group_field, 'aspect__name')
+        .annotate(count=Count('id'))
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=[F(group_field)],
+            order_by=[F('count').desc(), F('aspect__name').asc()],
+        ))
+        .filter(rank__lte=limit)
+        .order_by(group_field, 'rank')
+    )
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[group_field], []).append({'aspect': row['aspect__name'], 'count': row['count']})
+
+    return JsonResponse({
+        'group_by': group_by,
+        'groups': [{'group': group, 'aspects': aspects} for group, aspects in groups.items()],
+    }, json_dumps_params={'ensure_ascii': False})